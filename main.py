@@ -1,13 +1,16 @@
 import os
+import re
 import sys
+import zlib
 import time
 import shutil
-import json
 import argparse
-from datetime import datetime, timedelta
-from multiprocessing import Queue, Process
+from datetime import datetime
+from multiprocessing import Queue, Process, Event
+from queue import Empty
 import signal
-import logging
+import threading
+import concurrent.futures
 
 # --- Path Setup ---
 # This ensures that the script can be run from anywhere and still find its modules and config file.
@@ -16,7 +19,9 @@ PROJECT_ROOT = SCRIPT_DIR
 sys.path.append(SCRIPT_DIR)
 
 from src.utils.config_loader import load_config
-from src.utils.logger_setup import setup_logger
+from src.utils.logger_setup import setup_logger, shutdown_logger
+from src.utils.json_utils import dumps_line
+from src.utils.queues import BatchedQueue, LabeledQueue
 from src.collection.icmp_collector import IcmpCollector
 from src.collection.dns_collector import DnsCollector
 from src.collection.rdns_collector import RdnsCollector
@@ -30,11 +35,26 @@ config = None
 logger = None
 output_queue = None  # Will be created in workflows to avoid Windows spawn issues
 
+# Maximum number of queue items the I/O writer takes per write
+WRITER_BATCH_SIZE = 128
+# I/O writer file buffer size, and the longest it keeps written data buffered (seconds)
+WRITER_BUFFER_SIZE = 1 << 20
+WRITER_FLUSH_INTERVAL = 1.0
+# Mass writer: buffered CSV rows are written out after this many rows or seconds
+MASS_WRITER_FLUSH_RECORDS = 256
+MASS_WRITER_FLUSH_INTERVAL = 0.2
+# Seconds to wait for the I/O writer to confirm its final flush on shutdown
+WRITER_FLUSH_TIMEOUT = 30
+
+# First token of every non-blank line that is not a '#' comment
+_TARGET_LINE_RE = re.compile(rb'^[ \t]*([^#\s]\S*)', re.MULTILINE)
+
 def get_task_id(task_name, targets):
     """Generates a unique ID for the current task.
 
     NOTE: To keep directories tidy when many targets are used, we now only
-    include the timestamp in the task id (no IPs/targets).
+    include the timestamp in the task id (no IPs/targets). `targets` is the
+    target list as loaded; it is not joined or otherwise touched here.
     """
     timestamp = datetime.now().strftime("%Y%m%dT%H%M%S")
     # Only keep time component to avoid very long directory names
@@ -46,8 +66,9 @@ def load_targets(target_file):
         # Use print here because logger might not be initialized yet
         print(f"ERROR: Target file not found: {target_file}", file=sys.stderr)
         return []
-    with open(target_file, 'r', encoding='utf-8') as f:
-        targets = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    # Scan the whole file in one regex pass instead of a Python loop per line
+    with open(target_file, 'rb') as f:
+        targets = [m.decode('utf-8') for m in _TARGET_LINE_RE.findall(f.read())]
     # Logger will be available after this function is called in main
     if logger:
         logger.info(f"Loaded {len(targets)} targets from {target_file}")
@@ -55,134 +76,316 @@ def load_targets(target_file):
         print(f"INFO: Loaded {len(targets)} targets from {target_file}")
     return targets
 
-def io_writer_process(queue, output_file, log_dir, log_level, log_format):
+def _snapshot_file(src, dst):
+    """
+    Copies an input file (config, target list) into a task directory.
+
+    The snapshot must stay fixed even if the source is edited in place later,
+    so it is always a real copy rather than a hardlink. copyfile skips the
+    permission-bit copy of shutil.copy and uses the kernel fast-copy path
+    (sendfile) where the platform provides it.
+    """
+    shutil.copyfile(src, dst)
+
+def _pin_to_cpu(cpu, logger):
+    """
+    Pins the calling process to a single CPU, if requested and supported.
+
+    Args:
+        cpu (int): The CPU index to pin to; a negative value disables pinning.
+        logger (logging.Logger): Logger used to report the outcome.
+    """
+    if cpu < 0:
+        return
+    if not hasattr(os, 'sched_setaffinity'):
+        logger.warning("CPU pinning is not supported on this platform; writer_cpu ignored.")
+        return
+    try:
+        os.sched_setaffinity(0, {cpu})
+        logger.info(f"Pinned process {os.getpid()} to CPU {cpu}.")
+    except OSError as e:
+        logger.warning(f"Failed to pin process to CPU {cpu}: {e}")
+
+def _writer_shard(target_ip, shards):
+    """Returns the index of the writer shard responsible for target_ip (stable across runs)."""
+    return zlib.crc32(target_ip.encode('utf-8')) % shards
+
+
+def _drain_queue(queue, max_items, timeout=None):
+    """
+    Blocks for one queue item, then takes whatever else is already queued.
+
+    Args:
+        queue (multiprocessing.Queue): The writer's input queue.
+        max_items (int): Maximum number of queue items to take.
+        timeout (float): Seconds to wait for the first item; None blocks.
+
+    Returns:
+        list: The results taken (possibly empty on timeout). Lists put by a
+              BatchedQueue are flattened; the None sentinel is kept as is.
+    """
+    items = []
+    try:
+        items.append(queue.get(timeout=timeout))
+        while len(items) < max_items:
+            items.append(queue.get_nowait())
+    except Empty:
+        pass
+    results = []
+    for item in items:
+        if isinstance(item, list):
+            results.extend(item)
+        else:
+            results.append(item)
+    return results
+
+
+def _wait_for_run_duration(run_duration):
+    """
+    Blocks the main thread for the configured probing duration.
+
+    A single Event wait, ended early by SIGTERM (via the handler installed
+    here) or Ctrl+C.
+
+    Args:
+        run_duration (int): The probing duration in seconds.
+
+    Returns:
+        str: "duration-complete", or "signal" when the wait was interrupted.
+    """
+    stop_event = threading.Event()
+
+    def _handle_term(signum, frame):
+        stop_event.set()
+
+    try:
+        signal.signal(signal.SIGTERM, _handle_term)
+    except Exception:
+        # Some environments may not support signal operations (e.g., certain Windows contexts)
+        pass
+
+    try:
+        if stop_event.wait(run_duration):
+            return "signal"
+    except (KeyboardInterrupt, SystemExit):
+        return "signal"
+    return "duration-complete"
+
+
+def _run_oneshot_probes(collectors, max_workers, stop_event):
+    """
+    Runs every collector's probe once, in order, on a dedicated thread pool.
+
+    Used for the heavier one-shot probes (RDNS, Traceroute) so they neither go
+    through the scheduler nor take worker threads from the interval probes.
+    Probes that have not started yet when stop_event is set are skipped.
+
+    Args:
+        collectors (list): Collectors to run once each.
+        max_workers (int): Number of probes run concurrently.
+        stop_event (threading.Event): Set when the probe phase is ending.
+    """
+    def _probe(collector):
+        if not stop_event.is_set():
+            collector.run_probe()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='oneshot') as pool:
+        for collector in collectors:
+            pool.submit(_probe, collector)
+
+
+def io_writer_process(queue, output_file, log_dir, log_level, log_format, flush_done=None, meta_suffix='',
+                      writer_cpu=-1):
     """
     A dedicated process to write results from the queue to a file.
     This avoids I/O blocking in the worker threads.
+
+    When `flush_done` (a multiprocessing.Event) is given, it is set once the
+    writer has stopped and every output file has been flushed and fsynced.
+    `meta_suffix` is appended to the meta/ file names so that sharded writers
+    never share an output file. A non-negative `writer_cpu` pins the process
+    to that CPU.
     """
-    # Logger must be configured within the new process
-    writer_logger = setup_logger(log_dir, log_level, log_format)
+    # Logger must be configured within the new process; the writer logs to
+    # its own file so it never shares task.log with the main process
+    writer_logger = setup_logger(log_dir, log_level, log_format, log_filename='io_writer.log')
     writer_logger.info(f"I/O writer process started. Writing to {output_file}")
-    
-    # Use a different file for the writer's log to avoid conflicts
-    handler_index = -1
-    for i, handler in enumerate(writer_logger.handlers):
-        if isinstance(handler, logging.FileHandler):
-            handler_index = i
-            break
-    if handler_index != -1:
-        writer_logger.handlers[handler_index].close()
-        writer_logger.removeHandler(writer_logger.handlers[handler_index])
-        writer_log_file = os.path.join(log_dir, 'io_writer.log')
-        file_handler = logging.FileHandler(writer_log_file)
-        file_handler.setFormatter(logging.Formatter(log_format))
-        writer_logger.addHandler(file_handler)
+    _pin_to_cpu(writer_cpu, writer_logger)
 
     # Prepare separate folder for RDNS/Traceroute metadata
     meta_dir = os.path.join(os.path.dirname(output_file), 'meta')
     os.makedirs(meta_dir, exist_ok=True)
 
-    rdns_file_path = os.path.join(meta_dir, 'rdns.jsonl')
-    traceroute_file_path = os.path.join(meta_dir, 'traceroute.jsonl')
-
-    with open(output_file, 'a', encoding='utf-8') as f, \
-         open(rdns_file_path, 'a', encoding='utf-8') as frdns, \
-         open(traceroute_file_path, 'a', encoding='utf-8') as ftr:
-        while True:
+    rdns_file_path = os.path.join(meta_dir, f'rdns{meta_suffix}.jsonl')
+    traceroute_file_path = os.path.join(meta_dir, f'traceroute{meta_suffix}.jsonl')
+
+    with open(output_file, 'ab', buffering=WRITER_BUFFER_SIZE) as f, \
+         open(rdns_file_path, 'ab', buffering=WRITER_BUFFER_SIZE) as frdns, \
+         open(traceroute_file_path, 'ab', buffering=WRITER_BUFFER_SIZE) as ftr:
+        # Metadata probes go to meta/; everything else goes to the main data file
+        meta_files = {'rdns': frdns, 'traceroute': ftr}
+        last_flush = time.monotonic()
+        stop = False
+        while not stop:
             try:
-                result = queue.get()
-                if result is None:  # Sentinel value to stop the process
-                    writer_logger.info("I/O writer process received stop signal. Shutting down.")
-                    break
-                # Serialize dict to a JSON string before writing
-                try:
-                    probe_type = result.get('probe_type')
-                    if probe_type in ('rdns', 'traceroute'):
-                        if probe_type == 'rdns':
-                            frdns.write(json.dumps(result) + '\n')
-                            frdns.flush()
-                        else:
-                            ftr.write(json.dumps(result) + '\n')
-                            ftr.flush()
-                    else:
-                        f.write(json.dumps(result) + '\n')
-                        f.flush()
-                except Exception as e:
-                    writer_logger.error(f"Failed to write result: {e}", exc_info=True)
+                # Wait for one result, then take whatever else is already queued so
+                # the queue bookkeeping is paid once per batch; the timeout lets the
+                # periodic flush run while idle.
+                batch = _drain_queue(queue, WRITER_BATCH_SIZE, WRITER_FLUSH_INTERVAL)
+                # Encoded lines per output file; each file gets a single write per batch
+                pending = {}
+                for result in batch:
+                    if result is None:  # Sentinel value to stop the process
+                        writer_logger.info("I/O writer process received stop signal. Shutting down.")
+                        stop = True
+                        break
+                    # Serialize dict to a UTF-8 JSON line before writing
+                    try:
+                        fh = meta_files.get(result.get('probe_type'), f)
+                        pending.setdefault(fh, []).append(dumps_line(result))
+                    except Exception as e:
+                        writer_logger.error(f"Failed to write result: {e}", exc_info=True)
+                for fh, lines in pending.items():
+                    fh.write(b''.join(lines))
+                # Buffered data reaches the files at most WRITER_FLUSH_INTERVAL late
+                now = time.monotonic()
+                if now - last_flush >= WRITER_FLUSH_INTERVAL:
+                    for fh in (f, frdns, ftr):
+                        fh.flush()
+                    last_flush = now
             except (KeyboardInterrupt, SystemExit):
                 break
             except Exception as e:
                 writer_logger.error(f"I/O writer process encountered an error: {e}", exc_info=True)
+        for fh in (f, frdns, ftr):
+            try:
+                fh.flush()
+                os.fsync(fh.fileno())
+            except OSError as e:
+                writer_logger.warning(f"Failed to sync {fh.name}: {e}")
+    if flush_done is not None:
+        flush_done.set()
     writer_logger.info("I/O writer process finished.")
+    # Child processes skip atexit, so write out the queued log records here
+    shutdown_logger()
 
 
-def io_writer_process_mass(queue, output_dir, log_dir, log_level, log_format):
+def io_writer_process_mass(queue, output_dirs, log_dir, log_level, log_format, writer_cpu=-1, targets=None,
+                           flush_done=None):
     """
-    I/O writer for mass-scan mode: writes one CSV per IP under output_dir.
+    I/O writer for mass-scan mode: writes one CSV per IP under the output
+    directory of each result's label (see LabeledQueue).
 
     CSV schema: timestamp,target_ip,probe_type,rtt_ms,status
+    `output_dirs` maps each label to its directory. CSVs for the IPs listed per
+    label in `targets` are opened at startup; any other IP is opened on first
+    use. A non-negative `writer_cpu` pins the process to that CPU. When
+    `flush_done` (a multiprocessing.Event) is given, it is set once the writer
+    has stopped and every CSV has been written and closed.
     """
-    writer_logger = setup_logger(log_dir, log_level, log_format)
-    writer_logger.info(f"Mass I/O writer started. Output dir: {output_dir}")
-
-    # Rotate writer's own log to separate file
-    handler_index = -1
-    for i, handler in enumerate(writer_logger.handlers):
-        if isinstance(handler, logging.FileHandler):
-            handler_index = i
-            break
-    if handler_index != -1:
-        writer_logger.handlers[handler_index].close()
-        writer_logger.removeHandler(writer_logger.handlers[handler_index])
-        writer_log_file = os.path.join(log_dir, 'io_writer_mass.log')
-        file_handler = logging.FileHandler(writer_log_file)
-        file_handler.setFormatter(logging.Formatter(log_format))
-        writer_logger.addHandler(file_handler)
-
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Lazy-open file handles per IP with header
-    handles = {}
-
-    def _get_handle(ip):
-        path = os.path.join(output_dir, f"{ip}.csv")
-        if ip not in handles:
-            f = open(path, 'a', encoding='utf-8')
-            if os.stat(path).st_size == 0:
-                f.write('timestamp,target_ip,probe_type,rtt_ms,status\n')
-                f.flush()
-            handles[ip] = f
-        return handles[ip]
-
+    writer_logger = setup_logger(log_dir, log_level, log_format, log_filename='io_writer_mass.log')
+    writer_logger.info(f"Mass I/O writer started. Output dirs: {', '.join(output_dirs.values())}")
+    _pin_to_cpu(writer_cpu, writer_logger)
+
+    for output_dir in output_dirs.values():
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Per label, per IP: (file handle with header, CSV rows not yet written).
+    # Opened up front for the known targets, so a record needs two dict lookups.
+    handles = {label: {} for label in output_dirs}
+    header = 'timestamp,target_ip,probe_type,rtt_ms,status\n'
+    # Files this run created; removed at shutdown if they never got a row, so a
+    # target that sent nothing leaves no header-only CSV for the analyzer
+    created = {}
+
+    def _open_handle(label, ip):
+        path = os.path.join(output_dirs[label], f"{ip}.csv")
+        f = open(path, 'a', encoding='utf-8')
+        # Append mode starts at the end of the file, so position 0 means it is new
+        if f.tell() == 0:
+            f.write(header)
+            f.flush()
+            created[f] = path
+        handles[label][ip] = entry = (f, [])
+        return entry
+
+    for label, ip_list in (targets or {}).items():
+        # dict.fromkeys drops repeated IPs (keeping order) so no handle is opened twice
+        for ip in dict.fromkeys(ip_list):
+            try:
+                _open_handle(label, ip)
+            except OSError as e:
+                writer_logger.error(f"Failed to open CSV for {label}/{ip}: {e}")
+
+    # Entries with pending rows; written out every MASS_WRITER_FLUSH_RECORDS rows
+    # or MASS_WRITER_FLUSH_INTERVAL seconds
+    dirty = []
+
+    def _flush_pending():
+        for f, lines in dirty:
+            f.write(''.join(lines))
+            f.flush()
+            lines.clear()
+        dirty.clear()
+
+    pending_count = 0
+    last_flush = time.monotonic()
+    stop = False
     try:
-        while True:
+        while not stop:
             try:
-                item = queue.get()
-                if item is None:
-                    writer_logger.info("Mass I/O writer received stop signal.")
-                    break
-                ip = item.get('target_ip', 'unknown')
-                f = _get_handle(ip)
-                # Prepare CSV row (metadata omitted)
-                ts = item.get('timestamp', '')
-                probe_type = item.get('probe_type', '')
-                rtt = item.get('rtt_ms')
-                status = item.get('status', '')
-                rtt_str = '' if rtt is None else f"{float(rtt):.6f}"
-                line = f"{ts},{ip},{probe_type},{rtt_str},{status}\n"
-                f.write(line)
-                f.flush()
+                # Wait briefly for one result, then drain the burst already queued;
+                # the timeout lets the time-based flush fire while idle
+                batch = _drain_queue(queue, MASS_WRITER_FLUSH_RECORDS, MASS_WRITER_FLUSH_INTERVAL)
+                for item in batch:
+                    if item is None:
+                        writer_logger.info("Mass I/O writer received stop signal.")
+                        stop = True
+                        break
+                    try:
+                        label = item.get('label')
+                        ip = item.get('target_ip', 'unknown')
+                        # Prepare CSV row (metadata omitted)
+                        ts = item.get('timestamp', '')
+                        probe_type = item.get('probe_type', '')
+                        rtt = item.get('rtt_ms')
+                        status = item.get('status', '')
+                        rtt_str = '' if rtt is None else f"{float(rtt):.6f}"
+                        entry = handles[label].get(ip) or _open_handle(label, ip)
+                        lines = entry[1]
+                        if not lines:
+                            dirty.append(entry)
+                        lines.append(f"{ts},{ip},{probe_type},{rtt_str},{status}\n")
+                        pending_count += 1
+                    except Exception as e:
+                        writer_logger.error(f"Mass I/O writer error: {e}", exc_info=True)
+                now = time.monotonic()
+                if pending_count >= MASS_WRITER_FLUSH_RECORDS or now - last_flush >= MASS_WRITER_FLUSH_INTERVAL:
+                    _flush_pending()
+                    pending_count = 0
+                    last_flush = now
             except (KeyboardInterrupt, SystemExit):
                 break
             except Exception as e:
                 writer_logger.error(f"Mass I/O writer error: {e}", exc_info=True)
     finally:
-        for f in handles.values():
-            try:
-                f.close()
-            except Exception:
-                pass
+        try:
+            _flush_pending()
+        except Exception as e:
+            writer_logger.error(f"Mass I/O writer failed to flush pending rows: {e}", exc_info=True)
+        for label_handles in handles.values():
+            for f, _ in label_handles.values():
+                try:
+                    unused = f in created and f.tell() == len(header)
+                    f.close()
+                    if unused:
+                        os.remove(created[f])
+                except Exception:
+                    pass
+        if flush_done is not None:
+            flush_done.set()
         writer_logger.info("Mass I/O writer finished.")
+        shutdown_logger()
 
 
 def _parse_mass_targets(file_path: str):
@@ -248,7 +451,7 @@ def run_pair_workflow():
     # 3. Setup Task Directory and Logging
     task_name = config.get('General', 'task_name')
     # Directory only contains timestamp now
-    task_id = get_task_id(task_name, "_".join(targets))
+    task_id = get_task_id(task_name, targets)
     task_dir = os.path.join(PROJECT_ROOT, 'data', 'output', task_id)
     os.makedirs(task_dir, exist_ok=True)
 
@@ -265,28 +468,46 @@ def run_pair_workflow():
 
     # 4. Save a snapshot of the config for reproducibility
     config_snapshot_path = os.path.join(PROJECT_ROOT, 'configs', 'default_config.ini')
-    shutil.copy(config_snapshot_path, os.path.join(task_dir, 'config.ini'))
+    _snapshot_file(config_snapshot_path, os.path.join(task_dir, 'config.ini'))
     logger.info(f"Saved configuration snapshot to {task_dir}")
 
     # 5. Snapshot inputs for reproducibility
     try:
-        shutil.copy(target_file_path, os.path.join(task_dir, 'targets.txt'))
+        _snapshot_file(target_file_path, os.path.join(task_dir, 'targets.txt'))
         logger.info("Saved targets snapshot.")
     except Exception as e:
         logger.warning(f"Failed to snapshot targets file: {e}")
 
-    # 6. Start I/O Writer Process
-    output_queue = Queue()
-    output_file = os.path.join(task_dir, 'raw_data.jsonl')
-    io_process = Process(
-        target=io_writer_process,
-        args=(output_queue, output_file, task_dir, log_level, log_format)
-    )
-    io_process.start()
+    # 6. Start I/O Writer Process(es)
+    # With writer_shards > 1, results are split by target IP across several
+    # writers, each owning its own raw_data.shard<i>.jsonl and meta files.
+    writer_shards = max(1, config.getint('General', 'writer_shards', fallback=1))
+    # Optional CPU pinning: shard i runs on CPU writer_cpu + i
+    writer_cpu = config.getint('General', 'writer_cpu', fallback=-1)
+    output_queues, writer_events, io_processes = [], [], []
+    for shard in range(writer_shards):
+        suffix = '' if writer_shards == 1 else f'.shard{shard}'
+        shard_queue = Queue()
+        shard_flushed = Event()
+        output_file = os.path.join(task_dir, f'raw_data{suffix}.jsonl')
+        io_process = Process(
+            target=io_writer_process,
+            args=(shard_queue, output_file, task_dir, log_level, log_format, shard_flushed, suffix,
+                  writer_cpu + shard if writer_cpu >= 0 else -1)
+        )
+        io_process.start()
+        output_queues.append(shard_queue)
+        writer_events.append(shard_flushed)
+        io_processes.append(io_process)
+    if writer_shards > 1:
+        logger.info(f"Started {writer_shards} I/O writer shards.")
+    # Collectors put through BatchedQueue so results cross to the writers in lists
+    batched_queues = [BatchedQueue(q) for q in output_queues]
 
     # 7. Configure Scheduler and Thread Pool
+    worker_threads = config.getint('General', 'worker_threads', fallback=10)
     executors = {
-        'default': ThreadPoolExecutor(config.getint('General', 'worker_threads', fallback=10))
+        'default': ThreadPoolExecutor(worker_threads)
     }
     job_defaults = {
         'coalesce': config.getboolean('Scheduler', 'coalesce', fallback=True),  # Combine missed runs
@@ -297,10 +518,18 @@ def run_pair_workflow():
 
     # 8. Schedule Probing Jobs
     probe_interval = config.getint('Scheduler', 'probe_interval_seconds', fallback=1)
-    
+    # Probe switches are the same for every target; read them once, not per target
+    icmp_enabled = config.getboolean('ICMP', 'enabled', fallback=False)
+    dns_enabled = config.getboolean('DNS', 'enabled', fallback=False)
+    rdns_enabled = config.getboolean('RDNS', 'enabled', fallback=False)
+    traceroute_enabled = config.getboolean('Traceroute', 'enabled', fallback=False)
+    # RDNS & Traceroute are heavier and run once per target on their own pool
+    rdns_collectors, traceroute_collectors = [], []
+
     for target_ip in targets:
-        if config.getboolean('ICMP', 'enabled', fallback=False):
-            icmp_collector = IcmpCollector(target_ip, config, output_queue)
+        target_queue = batched_queues[_writer_shard(target_ip, writer_shards)]
+        if icmp_enabled:
+            icmp_collector = IcmpCollector(target_ip, config, target_queue)
             scheduler.add_job(
                 icmp_collector.run_probe,
                 'interval',
@@ -310,8 +539,8 @@ def run_pair_workflow():
             )
             logger.info(f"Scheduled ICMP probes for {target_ip} every {probe_interval}s.")
 
-        if config.getboolean('DNS', 'enabled', fallback=False):
-            dns_collector = DnsCollector(target_ip, config, output_queue)
+        if dns_enabled:
+            dns_collector = DnsCollector(target_ip, config, target_queue)
             scheduler.add_job(
                 dns_collector.run_probe,
                 'interval',
@@ -321,70 +550,60 @@ def run_pair_workflow():
             )
             logger.info(f"Scheduled DNS probes for {target_ip} every {probe_interval}s.")
 
-        # RDNS & Traceroute are heavier; schedule to run once shortly after start
-        if config.getboolean('RDNS', 'enabled', fallback=False):
-            rdns_collector = RdnsCollector(target_ip, config, output_queue)
-            scheduler.add_job(
-                rdns_collector.run_probe,
-                'date',
-                run_date=datetime.now() + timedelta(seconds=2),
-                id=f'rdns_{target_ip}',
-                replace_existing=True
-            )
-            logger.info(f"Scheduled RDNS probe once for {target_ip}.")
-
-        if config.getboolean('Traceroute', 'enabled', fallback=False):
-            tr_collector = TracerouteCollector(target_ip, config, output_queue)
-            scheduler.add_job(
-                tr_collector.run_probe,
-                'date',
-                run_date=datetime.now() + timedelta(seconds=3),
-                id=f'traceroute_{target_ip}',
-                replace_existing=True
-            )
-            logger.info(f"Scheduled Traceroute probe once for {target_ip}.")
+        if rdns_enabled:
+            rdns_collectors.append(RdnsCollector(target_ip, config, target_queue))
+        if traceroute_enabled:
+            traceroute_collectors.append(TracerouteCollector(target_ip, config, target_queue))
 
     # 9. Start the Scheduler and Wait (bounded by configured duration)
     scheduler.start()
     logger.info("Scheduler started. Probing is now active.")
 
+    # All RDNS probes are queued ahead of the Traceroute probes
+    oneshot_collectors = rdns_collectors + traceroute_collectors
+    oneshot_stop = threading.Event()
+    oneshot_thread = None
+    if oneshot_collectors:
+        oneshot_thread = threading.Thread(
+            target=_run_oneshot_probes,
+            args=(oneshot_collectors, worker_threads, oneshot_stop),
+            name='oneshot-probes',
+            daemon=True
+        )
+        oneshot_thread.start()
+        logger.info(f"Started {len(rdns_collectors)} RDNS and {len(traceroute_collectors)} Traceroute one-shot probes.")
+
     run_duration = config.getint('Scheduler', 'run_duration_seconds', fallback=300)
     logger.info(f"Probing will run for {run_duration} seconds as configured.")
     print(f"Probing started. Will run for {run_duration} seconds...")
 
-    # Handle graceful shutdown on SIGTERM as well
-    def _handle_term(signum, frame):
-        raise KeyboardInterrupt()
-
-    try:
-        signal.signal(signal.SIGTERM, _handle_term)
-    except Exception:
-        # Some environments may not support signal operations (e.g., certain Windows contexts)
-        pass
-
-    shutdown_reason = "duration-complete"
+    shutdown_reason = "signal"
     try:
-        # Keep the main thread alive for the configured duration
-        end_time = time.time() + run_duration
-        while time.time() < end_time:
-            time.sleep(1)
-    except (KeyboardInterrupt, SystemExit):
-        shutdown_reason = "signal"
+        shutdown_reason = _wait_for_run_duration(run_duration)
     finally:
         logger.info(f"Shutting down due to: {shutdown_reason}. Stopping scheduler and I/O process...")
         try:
-            scheduler.shutdown()
+            # Wait for running probes so their results are queued before the sentinel
+            scheduler.shutdown(wait=True)
         except Exception as e:
             logger.warning(f"Scheduler shutdown encountered an issue: {e}")
-        # Send sentinel value to stop the I/O process
-        try:
-            output_queue.put(None)
-        except Exception:
-            pass
-        io_process.join(timeout=5)  # Wait for the I/O process to finish
-        if io_process.is_alive():
-            logger.warning("I/O process did not terminate gracefully. Forcing termination.")
-            io_process.terminate()
+        # Skip one-shot probes that have not started; wait for the running ones
+        oneshot_stop.set()
+        if oneshot_thread is not None:
+            oneshot_thread.join()
+        # Hand over buffered results, then send sentinel value to stop the I/O process(es)
+        for bq, q in zip(batched_queues, output_queues):
+            try:
+                bq.flush()
+                q.put(None)
+            except Exception:
+                pass
+        # Each writer drains everything queued ahead of its sentinel, then confirms
+        for io_process, shard_flushed in zip(io_processes, writer_events):
+            if not shard_flushed.wait(timeout=WRITER_FLUSH_TIMEOUT):
+                logger.warning("I/O process did not confirm its final flush. Forcing termination.")
+                io_process.terminate()
+            io_process.join()
         logger.info("Probe phase shutdown complete. Proceeding to analysis...")
 
     # 10. Run Analysis automatically
@@ -435,18 +654,25 @@ def run_mass_scan():
 
     # Snapshot config and target list
     try:
-        shutil.copy(os.path.join(PROJECT_ROOT, 'configs', 'default_config.ini'), os.path.join(result_root, 'config.ini'))
-        shutil.copy(target_file_path, os.path.join(result_root, 'targets.txt'))
+        _snapshot_file(os.path.join(PROJECT_ROOT, 'configs', 'default_config.ini'), os.path.join(result_root, 'config.ini'))
+        _snapshot_file(target_file_path, os.path.join(result_root, 'targets.txt'))
     except Exception as e:
         logger.warning(f"Failed to snapshot inputs: {e}")
 
-    # 4. Start mass writer processes (ground & satellite)
-    ground_queue = Queue()
-    sat_queue = Queue()
-    io_ground = Process(target=io_writer_process_mass, args=(ground_queue, ground_dir, result_root, log_level, log_format))
-    io_sat = Process(target=io_writer_process_mass, args=(sat_queue, satellite_dir, result_root, log_level, log_format))
-    io_ground.start()
-    io_sat.start()
+    # 4. Start the mass writer process; it routes ground / satellite results
+    # to their own directories by label
+    mass_queue = Queue()
+    writer_flushed = Event()
+    io_process = Process(
+        target=io_writer_process_mass,
+        args=(mass_queue, {'ground': ground_dir, 'satellite': satellite_dir}, result_root, log_level, log_format,
+              config.getint('General', 'writer_cpu', fallback=-1),
+              {'ground': ground_targets, 'satellite': sat_targets}, writer_flushed)
+    )
+    io_process.start()
+    mass_batched = BatchedQueue(mass_queue)
+    ground_queue = LabeledQueue(mass_batched, 'ground')
+    sat_queue = LabeledQueue(mass_batched, 'satellite')
 
     # 5. Schedule probes with interval similar to pair mode
     executors = {
@@ -461,17 +687,21 @@ def run_mass_scan():
 
     probe_interval = config.getint('Scheduler', 'probe_interval_seconds', fallback=1)
 
+    # Probe switches are the same for every target; read them once, not per target
+    icmp_enabled = config.getboolean('ICMP', 'enabled', fallback=True)
+    dns_enabled = config.getboolean('DNS', 'enabled', fallback=False)
+
     # Schedule ICMP and optionally DNS for each set
     for ip in ground_targets:
-        if config.getboolean('ICMP', 'enabled', fallback=True):
+        if icmp_enabled:
             scheduler.add_job(IcmpCollector(ip, config, ground_queue).run_probe, 'interval', seconds=probe_interval, id=f'mass_icmp_ground_{ip}', replace_existing=True)
-        if config.getboolean('DNS', 'enabled', fallback=False):
+        if dns_enabled:
             scheduler.add_job(DnsCollector(ip, config, ground_queue).run_probe, 'interval', seconds=probe_interval, id=f'mass_dns_ground_{ip}', replace_existing=True)
 
     for ip in sat_targets:
-        if config.getboolean('ICMP', 'enabled', fallback=True):
+        if icmp_enabled:
             scheduler.add_job(IcmpCollector(ip, config, sat_queue).run_probe, 'interval', seconds=probe_interval, id=f'mass_icmp_sat_{ip}', replace_existing=True)
-        if config.getboolean('DNS', 'enabled', fallback=False):
+        if dns_enabled:
             scheduler.add_job(DnsCollector(ip, config, sat_queue).run_probe, 'interval', seconds=probe_interval, id=f'mass_dns_sat_{ip}', replace_existing=True)
 
     scheduler.start()
@@ -481,36 +711,26 @@ def run_mass_scan():
     logger.info(f"Mass probing will run for {run_duration} seconds as configured.")
     print(f"Mass probing started. Will run for {run_duration} seconds...")
 
-    def _handle_term(signum, frame):
-        raise KeyboardInterrupt()
-
-    try:
-        signal.signal(signal.SIGTERM, _handle_term)
-    except Exception:
-        pass
-
     try:
-        end_time = time.time() + run_duration
-        while time.time() < end_time:
-            time.sleep(1)
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("Mass scan interrupted by user.")
+        if _wait_for_run_duration(run_duration) == "signal":
+            logger.info("Mass scan interrupted by user.")
     finally:
         try:
-            scheduler.shutdown()
+            # Wait for running probes so their results are flushed before the sentinel
+            scheduler.shutdown(wait=True)
         except Exception:
             pass
-        # stop writers
-        for q in (ground_queue, sat_queue):
-            try:
-                q.put(None)
-            except Exception:
-                pass
-        for p in (io_ground, io_sat):
-            p.join(timeout=5)
-        for p in (io_ground, io_sat):
-            if p.is_alive():
-                p.terminate()
+        # Hand over buffered results, then stop the writer
+        try:
+            mass_batched.flush()
+            mass_queue.put(None)
+        except Exception:
+            pass
+        # The writer drains everything queued ahead of its sentinel, then confirms
+        if not writer_flushed.wait(timeout=WRITER_FLUSH_TIMEOUT):
+            logger.warning("Mass I/O process did not confirm its final flush. Forcing termination.")
+            io_process.terminate()
+        io_process.join()
         logger.info("Mass scan finished. Preparing mass analysis (if enabled)...")
 
         # Auto analyze mass results if enabled
@@ -573,9 +793,14 @@ def _choose_ip_interactively(ips: list[str], label: str) -> str:
     return sel
 
 
-def _build_pair_from_mass_dataset(result_dir: str, ground_ip: str, sat_ip: str, probe_type: str) -> str:
-    """Create a temporary pair-style dataset (raw_data.jsonl) from mass CSVs and return its directory."""
-    import csv, json as _json
+def _build_pair_from_mass_dataset(result_dir: str, ground_ip: str, sat_ip: str, probe_type: str) -> tuple:
+    """Create a temporary pair-style dataset (raw_data.jsonl) from mass CSVs.
+
+    Returns (directory, DataFrame); the DataFrame is in the form BaseAnalyzer.load_data
+    produces, so the analyzer can use it without re-reading raw_data.jsonl.
+    """
+    import pandas as pd
+    from src.analysis.base_analyzer import RESULT_COLUMNS, parse_timestamps
     timestamp = datetime.now().strftime('%Y%m%dT%H%M%S')
     out_dir = os.path.join(result_dir, f'pair_from_mass_{probe_type}_{ground_ip}_vs_{sat_ip}_{timestamp}')
     os.makedirs(out_dir, exist_ok=True)
@@ -583,25 +808,45 @@ def _build_pair_from_mass_dataset(result_dir: str, ground_ip: str, sat_ip: str,
 
     def emit_from_csv(csv_path: str):
         if not os.path.isfile(csv_path):
-            return
-        with open(csv_path, 'r', encoding='utf-8') as f, open(out_file, 'a', encoding='utf-8') as w:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if probe_type and row.get('probe_type') != probe_type:
-                    continue
-                rec = {
-                    'timestamp': row.get('timestamp'),
-                    'target_ip': row.get('target_ip'),
-                    'probe_type': row.get('probe_type'),
-                    'rtt_ms': float(row['rtt_ms']) if row.get('rtt_ms') not in (None, '',) else None,
-                    'status': row.get('status'),
-                    'metadata': {}
-                }
-                w.write(_json.dumps(rec) + '\n')
-
-    emit_from_csv(os.path.join(result_dir, 'ground', f'{ground_ip}.csv'))
-    emit_from_csv(os.path.join(result_dir, 'satellite', f'{sat_ip}.csv'))
-    return out_dir
+            return None
+        # Only an empty rtt_ms is missing; round_trip keeps rtt values identical to float()
+        df = pd.read_csv(
+            csv_path,
+            dtype={'timestamp': str, 'target_ip': str, 'probe_type': str, 'status': str, 'rtt_ms': 'float64'},
+            keep_default_na=False, na_values={'rtt_ms': ['']}, float_precision='round_trip'
+        )
+        if probe_type:
+            df = df[df['probe_type'] == probe_type]
+        # NaN != NaN marks a missing rtt, which is written as null
+        rtts = [None if rtt != rtt else rtt for rtt in df['rtt_ms'].tolist()]
+        lines = [
+            dumps_line({
+                'timestamp': ts,
+                'target_ip': ip,
+                'probe_type': pt,
+                'rtt_ms': rtt,
+                'status': status,
+                'metadata': {}
+            })
+            for ts, ip, pt, rtt, status in zip(df['timestamp'].tolist(), df['target_ip'].tolist(),
+                                               df['probe_type'].tolist(), rtts, df['status'].tolist())
+        ]
+        with open(out_file, 'ab') as w:
+            w.write(b''.join(lines))
+        return df
+
+    frames = [
+        df for df in (
+            emit_from_csv(os.path.join(result_dir, 'ground', f'{ground_ip}.csv')),
+            emit_from_csv(os.path.join(result_dir, 'satellite', f'{sat_ip}.csv')),
+        ) if df is not None
+    ]
+    if not frames:
+        return out_dir, pd.DataFrame()
+    data = pd.concat(frames, ignore_index=True)
+    data['timestamp'] = parse_timestamps(data['timestamp'])
+    data['metadata'] = [{} for _ in range(len(data))]
+    return out_dir, data[list(RESULT_COLUMNS)]
 
 
 def _list_timestamp_dirs(base_dir: str, limit: int = 5) -> list[str]:
@@ -685,10 +930,11 @@ def main():
         s_sel = _choose_ip_interactively(s_ips, 'satellite')
         # 选择探测类型（从已有数据考虑，默认 icmp）
         probe = input('请选择探测类型（icmp/dns，默认 icmp）: ').strip().lower() or 'icmp'
-        tmp_pair_dir = _build_pair_from_mass_dataset(result_dir, g_sel, s_sel, probe)
+        tmp_pair_dir, pair_df = _build_pair_from_mass_dataset(result_dir, g_sel, s_sel, probe)
         from src.analysis.pair_rtt_analyzer import PairRTTAnalyzer
         selected = _parse_analyses_arg(args.analyses, ['timeseries','kde','hist','box','ks','summary','loss'])
-        analyzer = PairRTTAnalyzer(tmp_pair_dir, analyses=selected)
+        # The dataset is already in memory; skip re-reading the raw_data.jsonl just written
+        analyzer = PairRTTAnalyzer(tmp_pair_dir, analyses=selected, df=pair_df)
         analyzer.run()
     else:
         print(f"未知模式: {mode}", file=sys.stderr)
@@ -1,33 +1,103 @@
+import os
+import glob
 import pandas as pd
 import logging
 from abc import ABC, abstractmethod
 
+from src.utils.json_utils import loads
+
 logger = logging.getLogger("SatelliteDetector.BaseAnalyzer")
 
+# Fields of a probe result record, in the order the collectors emit them
+RESULT_COLUMNS = ('timestamp', 'target_ip', 'probe_type', 'rtt_ms', 'status', 'metadata')
+
+
+def parse_timestamps(values):
+    """
+    Converts the ISO timestamp strings of probe results to datetimes.
+
+    The ISO 8601 fast path also accepts files that mix whole-second and
+    fractional timestamps; anything else falls back to pandas' inference.
+
+    Args:
+        values: A pandas Series (or list) of timestamp strings.
+
+    Returns:
+        pandas.Series: The parsed timestamps.
+    """
+    try:
+        return pd.to_datetime(values, format='ISO8601', cache=True)
+    except ValueError:
+        return pd.to_datetime(values)
+
+
+def categorize_columns(df, columns=('target_ip', 'probe_type', 'status')):
+    """
+    Converts the low-cardinality string columns of probe results to categoricals.
+
+    Masks and groupbys on these columns then compare and hash integer codes.
+    Categories are sorted, so groupby output keeps the order plain strings give.
+
+    Args:
+        df (pandas.DataFrame): Probe results; modified in place.
+        columns (tuple): The columns to convert, when present.
+
+    Returns:
+        pandas.DataFrame: The same frame.
+    """
+    for col in columns:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
 class BaseAnalyzer(ABC):
     """
     Abstract base class for all data analyzers.
     """
-    def __init__(self, task_dir):
+    def __init__(self, task_dir, df=None):
         """
         Initializes the base analyzer.
 
         Args:
             task_dir (str): The path to the task output directory.
+            df (pandas.DataFrame): Optional data already in load_data's form;
+                                   when given, run() does not read raw_data.jsonl.
         """
         self.task_dir = task_dir
         self.data_file = f"{task_dir}/raw_data.jsonl"
-        self.df = None
+        self.df = df
+
+    def _data_files(self):
+        """
+        Returns the raw data files of the task: raw_data.jsonl, or the
+        raw_data.shard<i>.jsonl files written by sharded I/O writers.
+        """
+        shard_files = sorted(glob.glob(os.path.join(self.task_dir, 'raw_data.shard*.jsonl')))
+        return shard_files or [self.data_file]
 
     def load_data(self):
         """
-        Loads data from the raw_data.jsonl file into a pandas DataFrame.
+        Loads data from the raw_data.jsonl file(s) into a pandas DataFrame.
         """
         try:
-            logger.info(f"Loading data from {self.data_file}")
-            self.df = pd.read_json(self.data_file, lines=True)
+            data_files = self._data_files()
+            logger.info(f"Loading data from {', '.join(data_files)}")
+            # Parse line by line straight into column lists, then build the frame once
+            columns = {name: [] for name in RESULT_COLUMNS}
+            appenders = [(name, columns[name].append) for name in RESULT_COLUMNS]
+            for path in data_files:
+                with open(path, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = loads(line)
+                        for name, append in appenders:
+                            append(record.get(name))
+            columns['rtt_ms'] = pd.Series(columns['rtt_ms'], dtype='float64')
+            self.df = pd.DataFrame(columns)
             # Convert timestamp to datetime objects
-            self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
+            self.df['timestamp'] = parse_timestamps(self.df['timestamp'])
             logger.info(f"Successfully loaded {len(self.df)} records.")
         except FileNotFoundError:
             logger.error(f"Data file not found: {self.data_file}")
@@ -47,8 +117,10 @@ class BaseAnalyzer(ABC):
         """
         Runs the full analysis pipeline.
         """
-        self.load_data()
+        if self.df is None:
+            self.load_data()
         if not self.df.empty:
+            categorize_columns(self.df)
             self.analyze()
         else:
             logger.warning("DataFrame is empty. Skipping analysis.")
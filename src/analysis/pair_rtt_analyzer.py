@@ -1,6 +1,7 @@
 import os
 import sys
 import logging
+import numpy as np
 import pandas as pd
 from scipy import stats
 
@@ -10,16 +11,34 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))
 sys.path.append(PROJECT_ROOT)
 
 from src.analysis.base_analyzer import BaseAnalyzer
-from src.analysis.plot_utils import (
-    plot_rtt_timeseries,
-    plot_rtt_distribution,
-    plot_rtt_boxplot,
-    plot_rtt_histogram,
-)
 from src.utils.logger_setup import setup_logger
 
 logger = logging.getLogger("SatelliteDetector.PairRTTAnalyzer")
 
+# Analysis key -> (plot_utils function name, extra kwargs), in plotting order.
+# plot_utils (matplotlib/seaborn) is only imported when one of these is selected.
+_PLOT_MAP = {
+    'timeseries': ('plot_rtt_timeseries', {}),
+    'kde': ('plot_rtt_distribution', {}),
+    'hist': ('plot_rtt_histogram', {'bins': 50, 'kde': False}),
+    'box': ('plot_rtt_boxplot', {}),
+}
+
+
+def _split_by_probe_type(df):
+    """
+    Returns [(prefix, frame)] for the combined data, then ICMP and DNS.
+
+    The per-type frames come from one groupby pass and keep df's row order;
+    a probe type without rows gives None.
+    """
+    per_type = dict(list(df.groupby('probe_type', sort=False, observed=True)))
+    return [
+        ('combined', df),
+        ('icmp', per_type.get('icmp')),
+        ('dns', per_type.get('dns')),
+    ]
+
 
 class PairRTTAnalyzer(BaseAnalyzer):
     """
@@ -27,8 +46,8 @@ class PairRTTAnalyzer(BaseAnalyzer):
     including statistics, packet loss, and visualizations.
     """
 
-    def __init__(self, task_dir, analyses: list[str] | None = None):
-        super().__init__(task_dir)
+    def __init__(self, task_dir, analyses: list[str] | None = None, df: pd.DataFrame | None = None):
+        super().__init__(task_dir, df=df)
         # 支持的分析项：timeseries,kde,hist,box,ks,summary,loss
         self.analyses = analyses or ['timeseries','kde','hist','box','ks','summary','loss']
 
@@ -47,68 +66,46 @@ class PairRTTAnalyzer(BaseAnalyzer):
             logger.warning("No successful probes found. Cannot perform RTT analysis.")
             return
 
+        # Per-target loss counts, shared by the log output and packet_loss.csv
+        loss_df = self.packet_loss_table()
+
         # --- Analysis ---
         if self._do('loss'):
-            self.calculate_packet_loss()
+            self.calculate_packet_loss(loss_df)
+        stats_df = self.descriptive_stats_table(success_df)
         if self._do('summary'):
-            self.calculate_descriptive_stats(success_df)
-        if self._do('ks'):
-            self.perform_ks_test(success_df)
+            self.calculate_descriptive_stats(success_df, stats_df)
+        # The K-S test both logs its result and feeds ks_test.json; run it once
+        ks_result = self.perform_ks_test(success_df, return_result=True)
 
         # --- Visualization ---
-        plot_dir = os.path.join(self.task_dir, 'plots')
-        # Combined
-        if self._do('timeseries'):
-            plot_rtt_timeseries(success_df, plot_dir, filename_prefix='combined')
-        if self._do('kde'):
-            plot_rtt_distribution(success_df, plot_dir, filename_prefix='combined')
-        if self._do('hist'):
-            plot_rtt_histogram(success_df, plot_dir, filename_prefix='combined', bins=50, kde=False)
-        if self._do('box'):
-            plot_rtt_boxplot(success_df, plot_dir, filename_prefix='combined')
-        # Per-type
-        icmp_df = success_df[success_df['probe_type'] == 'icmp']
-        if not icmp_df.empty:
-            if self._do('timeseries'):
-                plot_rtt_timeseries(icmp_df, plot_dir, filename_prefix='icmp')
-            if self._do('kde'):
-                plot_rtt_distribution(icmp_df, plot_dir, filename_prefix='icmp')
-            if self._do('hist'):
-                plot_rtt_histogram(icmp_df, plot_dir, filename_prefix='icmp', bins=50, kde=False)
-            if self._do('box'):
-                plot_rtt_boxplot(icmp_df, plot_dir, filename_prefix='icmp')
-        dns_df = success_df[success_df['probe_type'] == 'dns']
-        if not dns_df.empty:
-            if self._do('timeseries'):
-                plot_rtt_timeseries(dns_df, plot_dir, filename_prefix='dns')
-            if self._do('kde'):
-                plot_rtt_distribution(dns_df, plot_dir, filename_prefix='dns')
-            if self._do('hist'):
-                plot_rtt_histogram(dns_df, plot_dir, filename_prefix='dns', bins=50, kde=False)
-            if self._do('box'):
-                plot_rtt_boxplot(dns_df, plot_dir, filename_prefix='dns')
+        plot_keys = [key for key in _PLOT_MAP if self._do(key)]
+        if plot_keys:
+            from src.analysis import plot_utils
+            plot_dir = os.path.join(self.task_dir, 'plots')
+            # seaborn orders categorical hues by category and lists unused ones; plain
+            # strings keep the legends in order of appearance. Converted once here, so
+            # every subset below (sorted or not) already carries strings.
+            plot_df = success_df.astype({'target_ip': str, 'probe_type': str})
+            subsets = _split_by_probe_type(plot_df)
+            # Timeseries plots want time order: sort once and split that, instead of
+            # sorting each subset. Other plots keep the original order (hue order).
+            if 'timeseries' in plot_keys:
+                sorted_subsets = _split_by_probe_type(plot_df.sort_values('timestamp', kind='mergesort'))
+            for i, (prefix, subset) in enumerate(subsets):
+                if subset is None:
+                    continue
+                for key in plot_keys:
+                    func_name, kwargs = _PLOT_MAP[key]
+                    data = sorted_subsets[i][1] if key == 'timeseries' else subset
+                    getattr(plot_utils, func_name)(data, plot_dir, filename_prefix=prefix, **kwargs)
 
         # --- Export analysis artifacts ---
-        pkt_loss_records = []
-        for target, group in self.df.groupby('target_ip'):
-            total_probes = len(group)
-            non_success = len(group[group['status'] != 'success'])
-            loss_pct = (non_success / total_probes) * 100 if total_probes else 0.0
-            pkt_loss_records.append({
-                'target_ip': target,
-                'total_probes': total_probes,
-                'non_success': non_success,
-                'packet_loss_percent': round(loss_pct, 3)
-            })
-
-        import pandas as _pd
-        pd_pkt = _pd.DataFrame(pkt_loss_records)
+        pd_pkt = loss_df.assign(packet_loss_percent=loss_df['packet_loss_percent'].map(lambda v: round(v, 3)))
         pd_pkt.to_csv(os.path.join(self.task_dir, 'packet_loss.csv'), index=False)
 
-        stats_df = success_df.groupby(['target_ip', 'probe_type'])['rtt_ms'].describe()
         stats_df.to_csv(os.path.join(self.task_dir, 'descriptive_stats.csv'))
 
-        ks_result = self.perform_ks_test(success_df, return_result=True)
         if ks_result:
             import json as _json
             with open(os.path.join(self.task_dir, 'ks_test.json'), 'w', encoding='utf-8') as f:
@@ -116,20 +113,58 @@ class PairRTTAnalyzer(BaseAnalyzer):
 
         logger.info("RTT analysis (pair mode) complete.")
 
-    def calculate_packet_loss(self):
-        """Calculates and logs the packet loss percentage for each target."""
+    def packet_loss_table(self):
+        """
+        Counts probes and non-successful probes per target in one groupby.
+
+        Returns:
+            pd.DataFrame: Columns target_ip, total_probes, non_success and
+            packet_loss_percent (unrounded), one row per target.
+        """
+        non_success = (self.df['status'] != 'success').groupby(self.df['target_ip'], observed=True)
+        loss_df = pd.DataFrame({
+            'total_probes': non_success.size(),
+            'non_success': non_success.sum(),
+        })
+        loss_df['packet_loss_percent'] = loss_df['non_success'] / loss_df['total_probes'] * 100
+        return loss_df.reset_index()
+
+    def calculate_packet_loss(self, loss_df=None):
+        """
+        Logs the packet loss percentage for each target.
+
+        Args:
+            loss_df (pd.DataFrame | None): Result of packet_loss_table(); computed if not given.
+        """
         logger.info("--- Packet Loss Calculation ---")
-        for target, group in self.df.groupby('target_ip'):
-            total_probes = len(group)
-            non_success_probes = len(group[group['status'] != 'success'])
-            loss_percentage = (non_success_probes / total_probes) * 100
+        if loss_df is None:
+            loss_df = self.packet_loss_table()
+        for target, total_probes, non_success_probes, loss_percentage in loss_df.itertuples(index=False):
             logger.info(f"Target: {target} -> Packet Loss: {loss_percentage:.2f}% ({non_success_probes}/{total_probes})")
 
-    def calculate_descriptive_stats(self, df):
-        """Calculates and logs descriptive statistics for RTTs. Returns DataFrame."""
+    def descriptive_stats_table(self, df):
+        """Returns describe() of RTTs per (target_ip, probe_type)."""
+        return df.groupby(['target_ip', 'probe_type'], observed=True)['rtt_ms'].describe()
+
+    def calculate_descriptive_stats(self, df, stats_df=None):
+        """
+        Logs descriptive statistics for RTTs. Returns DataFrame.
+
+        Args:
+            df (pd.DataFrame): Successful probes.
+            stats_df (pd.DataFrame | None): Result of descriptive_stats_table(df); computed if not given.
+        """
         logger.info("--- Descriptive RTT Statistics (ms) ---")
-        stats_df = df.groupby(['target_ip', 'probe_type'])['rtt_ms'].describe()
-        logger.info("\n" + stats_df.to_string())
+        if stats_df is None:
+            stats_df = self.descriptive_stats_table(df)
+        if logger.isEnabledFor(logging.INFO):
+            # One line per (target_ip, probe_type) instead of one rendered table string
+            for (target, probe_type), row in stats_df.iterrows():
+                logger.info(
+                    "%s %s n=%d mean=%.2f std=%.2f min=%.2f p50=%.2f max=%.2f",
+                    target, probe_type, row['count'], row['mean'], row['std'],
+                    row['min'], row['50%'], row['max'],
+                )
         return stats_df
 
     def perform_ks_test(self, df, return_result=False):
@@ -137,15 +172,21 @@ class PairRTTAnalyzer(BaseAnalyzer):
         Performs a Kolmogorov-Smirnov test between RTT distributions
         if there are exactly two target IPs to compare.
         """
-        targets = df['target_ip'].unique()
+        # Integer codes per target (in order of first appearance, like unique())
+        codes, targets = pd.factorize(df['target_ip'])
         if len(targets) == 2:
             logger.info("--- Kolmogorov-Smirnov (K-S) Test ---")
             ip1, ip2 = targets[0], targets[1]
-            rtt_data_1 = df.loc[df['target_ip'] == ip1, 'rtt_ms'].dropna()
-            rtt_data_2 = df.loc[df['target_ip'] == ip2, 'rtt_ms'].dropna()
-
-            if len(rtt_data_1) > 1 and len(rtt_data_2) > 1:
-                ks_statistic, p_value = stats.ks_2samp(rtt_data_1, rtt_data_2)
+            # Split plain float64 arrays by code; ks_2samp sorts them without Series overhead
+            rtts = df['rtt_ms'].to_numpy(dtype='float64')
+            valid = ~np.isnan(rtts)
+            mask_1 = valid & (codes == 0)
+            mask_2 = valid & (codes == 1)
+            # Count first; the samples are only extracted when the test can run
+            n_1, n_2 = np.count_nonzero(mask_1), np.count_nonzero(mask_2)
+
+            if n_1 > 1 and n_2 > 1:
+                ks_statistic, p_value = stats.ks_2samp(rtts[mask_1], rtts[mask_2])
                 logger.info(f"Comparing '{ip1}' and '{ip2}':")
                 logger.info(f"  K-S Statistic: {ks_statistic:.4f}")
                 logger.info(f"  P-value: {p_value:.4g}")
@@ -166,7 +207,7 @@ class PairRTTAnalyzer(BaseAnalyzer):
                 if return_result:
                     return {
                         'note': 'insufficient_samples',
-                        'counts': {targets[0]: int(len(rtt_data_1)), targets[1]: int(len(rtt_data_2))}
+                        'counts': {targets[0]: int(n_1), targets[1]: int(n_2)}
                     }
         else:
             logger.info("Skipping K-S test: requires exactly two target IPs for comparison.")
@@ -1,4 +1,9 @@
+import matplotlib
+# Plots are only ever written to files; Agg avoids loading a GUI backend
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import seaborn as sns
 import os
 import logging
@@ -15,7 +20,7 @@ plt.rcParams.update({
     'ytick.labelsize': 11,
 })
 
-def save_plot(fig, save_dir, filename, dpi=300):
+def save_plot(fig, save_dir, filename, dpi=150, tight=False):
     """
     Saves a matplotlib figure to a specified directory.
 
@@ -24,12 +29,14 @@ def save_plot(fig, save_dir, filename, dpi=300):
         save_dir (str): The directory to save the plot in.
         filename (str): The name of the output file.
         dpi (int): The resolution of the saved image.
+        tight (bool): Crop to the drawn content (bbox_inches='tight'). This renders
+            the figure twice, so it is off by default; callers run fig.tight_layout().
     """
     if not os.path.exists(save_dir):
         os.makedirs(save_dir)
     save_path = os.path.join(save_dir, filename)
     try:
-        fig.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        fig.savefig(save_path, dpi=dpi, bbox_inches='tight' if tight else None)
         logger.info(f"Plot saved to {save_path}")
         plt.close(fig)  # Close the figure to free up memory
     except Exception as e:
@@ -51,11 +58,74 @@ def _ensure_non_negative_rtt(df, col='rtt_ms'):
     If negative values exist, they will be clipped to 0 for visualization.
     """
     if df[col].min() < 0:
-        df = df.copy()
-        df[col] = df[col].clip(lower=0)
+        # assign copies only the replaced column, not the whole frame
+        df = df.assign(**{col: df[col].clip(lower=0)})
     return df
 
 
+def _kde_sample(df, hue=None, cap=200_000):
+    """
+    Return df, or a random subset with at most `cap` rows per hue group.
+
+    KDE cost grows with the number of samples while the estimated curve barely
+    changes beyond a few hundred thousand points, so large inputs are sampled
+    down (with a fixed seed, so plots are reproducible) before KDE plotting.
+    """
+    if len(df) <= cap:
+        return df
+    if hue is None:
+        return df.sample(cap, random_state=0)
+    return pd.concat([
+        g if len(g) <= cap else g.sample(cap, random_state=0)
+        for _, g in df.groupby(hue, sort=False, observed=True)
+    ])
+
+
+def _fast_hist(ax, values, bins, label=None):
+    """
+    Draw a density step histogram with np.histogram + ax.stairs.
+
+    Equivalent to sns.histplot(stat='density', element='step', fill=False) for a
+    single array, without seaborn's per-call DataFrame pipeline. `bins` may be a
+    count or an array of edges (pass shared edges to overlay several groups).
+    """
+    density, edges = np.histogram(np.asarray(values, dtype='float64'), bins=bins, density=True)
+    ax.stairs(density, edges, label=label, fill=False, linewidth=1.5)
+
+
+def _binned_kde(values, gridsize=512, bins_per_grid=4):
+    """
+    Gaussian KDE of `values` evaluated on `gridsize` points over [min, max].
+
+    Samples are binned onto a fine histogram and smoothed with a sampled Gaussian
+    kernel (Scott's rule bandwidth, as in scipy.stats.gaussian_kde), so the cost
+    is O(N + bins * kernel) instead of O(N * gridsize).
+
+    Returns:
+        tuple: (x, density) arrays, or None when there are fewer than two
+        distinct values.
+    """
+    values = np.asarray(values, dtype='float64')
+    if values.size < 2:
+        return None
+    lo, hi = values.min(), values.max()
+    if lo == hi:
+        return None
+    bw = values.std(ddof=1) * values.size ** (-1 / 5)
+    # Pad by 4 bandwidths so the kernel mass near the edges is kept
+    n_bins = gridsize * bins_per_grid
+    pad = 4 * bw
+    counts, edges = np.histogram(values, bins=n_bins, range=(lo - pad, hi + pad))
+    width = edges[1] - edges[0]
+    half = int(np.ceil(pad / width))
+    offsets = np.arange(-half, half + 1) * width
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+    density = np.convolve(counts, kernel, mode='same') / (values.size * bw * np.sqrt(2 * np.pi))
+    centers = (edges[:-1] + edges[1:]) / 2
+    x = np.linspace(lo, hi, gridsize)
+    return x, np.interp(x, centers, density)
+
+
 def _auto_hue(df):
     """Choose hue automatically: prefer probe_type when it has >1 unique values, else target_ip."""
     if 'probe_type' in df.columns and df['probe_type'].nunique() > 1:
@@ -63,15 +133,40 @@ def _auto_hue(df):
     return 'target_ip', 'Target IP'
 
 
-def plot_rtt_timeseries(df, save_dir, filename_prefix="combined"):
+def _decimate_timeseries(df, group_keys=('target_ip', 'probe_type'), max_points=2000):
+    """
+    Keep every k-th row of each group so that no group has more than
+    `max_points` rows (stride decimation; groups already below it are untouched).
+    Rows keep their order.
+    """
+    groups = df.groupby(list(group_keys), sort=False, observed=True)
+    sizes = groups['rtt_ms'].transform('size')
+    if sizes.max() <= max_points:
+        return df
+    # Ceiling division: a floor stride leaves groups of up to 2*max_points-1 whole
+    stride = (-(-sizes // max_points)).clip(lower=1)
+    return df[groups.cumcount() % stride == 0]
+
+
+def plot_rtt_timeseries(df, save_dir, filename_prefix="combined", max_points: int | None = 2000):
     """
     Plots RTT over time for each target IP and probe type.
+
+    Each (target_ip, probe_type) line is decimated to about `max_points` points
+    (None draws every sample); a line cannot show more detail than that at the
+    saved resolution.
     """
     fig, ax = plt.subplots(figsize=(16, 7))
 
+    # Callers usually pass time-sorted data; the O(N) check skips the sort then
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', kind='mergesort')
+    if max_points:
+        df = _decimate_timeseries(df, max_points=max_points)
+
     # Draw smoother lines without markers; separate hue/style
     sns.lineplot(
-        data=df.sort_values('timestamp'),
+        data=df,
         x='timestamp', y='rtt_ms',
         hue='target_ip', style='probe_type',
         ax=ax, linewidth=1.6, alpha=0.9, marker=None, errorbar=None
@@ -103,18 +198,18 @@ def plot_rtt_distribution(df, save_dir, filename_prefix="combined", hue: str | N
     else:
         legend_title = 'Probe Type' if hue == 'probe_type' else 'Target IP'
 
-    sns.kdeplot(
-        data=df_plot,
-        x='rtt_ms',
-        hue=hue,
-        fill=True,
-        common_norm=False,
-        alpha=0.25,
-        linewidth=1.5,
-        ax=ax,
-        clip=(0, None),  # do not draw negative densities
-        cut=0,
-    )
+    # One binned KDE per hue group, each normalised on its own (common_norm=False);
+    # the curve spans the group's data range only (cut=0), and RTTs are non-negative
+    groups = df_plot.groupby(hue, sort=False, observed=True)['rtt_ms']
+    palette = sns.color_palette(n_colors=groups.ngroups)
+    for color, (name, rtts) in zip(palette, groups):
+        curve = _binned_kde(rtts)
+        if curve is None:
+            continue
+        x, y = curve
+        ax.fill_between(x, y, color=color, alpha=0.25, linewidth=0)
+        ax.plot(x, y, color=color, linewidth=1.5, label=name)
+    ax.set_ylim(bottom=0)
 
     ax.set_title('RTT Distribution (KDE)')
     ax.set_xlabel('RTT (ms)')
@@ -182,7 +277,7 @@ def plot_rtt_histogram(
 
     if kde:
         sns.kdeplot(
-            data=df_plot,
+            data=_kde_sample(df_plot, hue),
             x='rtt_ms',
             hue=hue,
             common_norm=False,
@@ -1,6 +1,7 @@
 import logging
 from abc import ABC, abstractmethod
-from datetime import datetime
+
+from src.utils.time_utils import utc_isoformat_now
 
 logger = logging.getLogger("SatelliteDetector.Collector")
 
@@ -43,7 +44,7 @@ class BaseCollector(ABC):
         """
         try:
             rtt_ms, status, metadata = self.probe()
-            timestamp = datetime.utcnow().isoformat()
+            timestamp = utc_isoformat_now()
 
             result = {
                 "timestamp": timestamp,
@@ -56,13 +57,13 @@ class BaseCollector(ABC):
             
             if self.output_queue:
                 self.output_queue.put(result)
-                logger.debug(f"Successfully queued result for {self.target_ip} via {self.probe_type}")
+                logger.debug("Successfully queued result for %s via %s", self.target_ip, self.probe_type)
 
         except Exception as e:
             logger.error(f"Exception in {self.probe_type} probe for {self.target_ip}: {e}", exc_info=True)
             # Optionally, you could put an error result in the queue
             error_result = {
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": utc_isoformat_now(),
                 "target_ip": self.target_ip,
                 "probe_type": self.probe_type,
                 "rtt_ms": None,
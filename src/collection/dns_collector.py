@@ -1,5 +1,11 @@
+import copy
+import socket
+import collections
+import threading
+import dns.entropy
+import dns.exception
+import dns.inet
 import dns.message
-import dns.query
 import dns.rdatatype
 import time
 import logging
@@ -7,10 +13,151 @@ from .base_collector import BaseCollector
 
 logger = logging.getLogger("SatelliteDetector.DNSCollector")
 
+DNS_PORT = 53
+# Receive buffer requested for the shared DNS sockets (bytes)
+SHARED_SOCKET_RCVBUF = 4 * 1024 * 1024
+
+
+class _PendingQuery:
+    """A query waiting on a _SharedUdpSocket: datagrams received for its key."""
+    __slots__ = ('event', 'replies')
+
+    def __init__(self):
+        self.event = threading.Event()
+        # (wire, perf_counter_ns at arrival) appended by the receiver thread
+        self.replies = collections.deque()
+
+
+class _SharedUdpSocket:
+    """
+    One UDP socket for every DNS query of an address family.
+
+    Probes register (packed target address, query ID) before sending; a daemon
+    receiver thread stamps each datagram's arrival time and hands it to the probe
+    waiting on that key. Datagrams nobody waits for (late answers to timed-out
+    queries, foreign traffic) are dropped.
+    """
+    def __init__(self, af):
+        self._af = af
+        self._sock = socket.socket(af, socket.SOCK_DGRAM)
+        # Every target's replies land in this one buffer; the kernel caps the
+        # request at net.core.rmem_max
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SHARED_SOCKET_RCVBUF)
+        if hasattr(socket, 'SIO_UDP_CONNRESET'):
+            # Windows: without this an ICMP port-unreachable from any target makes the
+            # next recvfrom raise WSAECONNRESET on this socket shared by all targets
+            self._sock.ioctl(socket.SIO_UDP_CONNRESET, False)
+        self._lock = threading.Lock()
+        self._pending = {}
+        threading.Thread(target=self._receive_loop, name='dns-receiver', daemon=True).start()
+
+    def register(self, key):
+        """Returns a _PendingQuery for `key`, or None if that key is already in flight."""
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending[key] = pending = _PendingQuery()
+            return pending
+
+    def unregister(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def sendto(self, wire, address):
+        self._sock.sendto(wire, address)
+
+    def _receive_loop(self):
+        while True:
+            try:
+                wire, address = self._sock.recvfrom(65535)
+            except ConnectionResetError:
+                # A stale port-unreachable report, not a socket failure; back off
+                # only for real errors so other targets' arrival stamps stay exact
+                continue
+            except OSError as e:
+                logger.debug("DNS receive error: %s", e)
+                time.sleep(0.01)
+                continue
+            recv_ns = time.perf_counter_ns()
+            if len(wire) < 2:
+                continue
+            try:
+                # IPv6 link-local sources come back as 'fe80::1%eth0'; key on the address only
+                key = (socket.inet_pton(self._af, address[0].split('%', 1)[0]), int.from_bytes(wire[:2], 'big'))
+            except OSError:
+                continue
+            with self._lock:
+                pending = self._pending.get(key)
+            if pending is not None:
+                pending.replies.append((wire, recv_ns))
+                pending.event.set()
+
+
 class DnsCollector(BaseCollector):
     """
     Collector for DNS query RTT measurements.
     """
+    def __init__(self, target_ip, config, output_queue):
+        """
+        Initializes the DNS collector, reading its settings and building the query once.
+
+        Args:
+            target_ip (str): The target IP address to probe.
+            config (configparser.ConfigParser): The application configuration.
+            output_queue (multiprocessing.Queue): The queue to put results into.
+        """
+        super().__init__(target_ip, config, output_queue)
+        self._domain = config.get('DNS', 'query_domain', fallback='google.com')
+        self._qtype_str = config.get('DNS', 'query_type', fallback='A')
+        self._timeout = config.getfloat('DNS', 'timeout', fallback=3.0)
+        # Template query; each probe sends a copy with a fresh random ID
+        self._request = dns.message.make_query(self._domain, dns.rdatatype.from_text(self._qtype_str))
+        # (address family, packed address) of target_ip; resolved on the first probe
+        # so an invalid address still fails that probe rather than collector setup
+        self._af = None
+        self._addr = None
+
+    # UDP socket per address family shared by all DNS collectors: one fd in total
+    # rather than one per target
+    _sockets = {}
+    _sockets_lock = threading.Lock()
+
+    @classmethod
+    def _get_socket(cls, af):
+        with cls._sockets_lock:
+            sock = cls._sockets.get(af)
+            if sock is None:
+                sock = cls._sockets[af] = _SharedUdpSocket(af)
+            return sock
+
+    @staticmethod
+    def _wait_for_reply(request, pending, deadline):
+        """
+        Waits until a datagram that answers `request` arrives.
+
+        Datagrams that merely carry the same ID (a late reply to an earlier query,
+        malformed packets) are skipped, as dns.query.udp(ignore_errors=True) does.
+
+        Returns:
+            int: perf_counter_ns timestamp at which the reply arrived.
+
+        Raises:
+            dns.exception.Timeout: If no reply arrives before `deadline`.
+        """
+        while True:
+            # Clear before draining so a datagram appended meanwhile re-sets it
+            pending.event.clear()
+            while pending.replies:
+                wire, recv_ns = pending.replies.popleft()
+                try:
+                    if request.is_response(dns.message.from_wire(wire)):
+                        return recv_ns
+                except dns.exception.DNSException:
+                    pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not pending.event.wait(remaining):
+                raise dns.exception.Timeout
+
     def probe(self):
         """
         Executes a single DNS query to the target IP and measures the RTT.
@@ -18,35 +165,47 @@ class DnsCollector(BaseCollector):
         Returns:
             tuple: (rtt_ms, status, metadata)
         """
-        domain = self.config.get('DNS', 'query_domain', fallback='google.com')
-        qtype_str = self.config.get('DNS', 'query_type', fallback='A')
-        timeout = self.config.getfloat('DNS', 'timeout', fallback=3.0)
-        
-        qtype = dns.rdatatype.from_text(qtype_str)
-        request = dns.message.make_query(domain, qtype)
-        
+        domain = self._domain
+        qtype_str = self._qtype_str
+        timeout = self._timeout
+
         metadata = {
             "query_domain": domain,
             "query_type": qtype_str
         }
 
         try:
-            start_time = time.perf_counter()
-            # Use UDP for standard queries, sending the query specifically to the target IP
-            response = dns.query.udp(request, self.target_ip, timeout=timeout)
-            end_time = time.perf_counter()
-
-            if response:
-                rtt_ms = (end_time - start_time) * 1000
-                logger.debug(f"DNS probe to {self.target_ip} for {domain} [{qtype_str}] success: {rtt_ms:.2f} ms.")
-                return rtt_ms, "success", metadata
-            else:
-                # This case is unlikely with dns.query.udp as it usually raises an exception on failure
-                logger.warning(f"DNS probe to {self.target_ip} for {domain} returned no response.")
-                return None, "error", {"error_message": "No response"}
+            if self._addr is None:
+                self._af = dns.inet.af_for_address(self.target_ip)
+                self._addr = socket.inet_pton(self._af, self.target_ip.split('%', 1)[0])
+            shared = self._get_socket(self._af)
+
+            # Fresh random ID per query; redraw in the unlikely case that another
+            # query to the same target is in flight with it
+            request = copy.copy(self._request)
+            while True:
+                request.id = dns.entropy.random_16()
+                key = (self._addr, request.id)
+                pending = shared.register(key)
+                if pending is not None:
+                    break
+
+            try:
+                wire = request.to_wire()
+                start_ns = time.perf_counter_ns()
+                # Use UDP for standard queries, sending the query specifically to the target IP.
+                # The reply's arrival is timestamped by the socket's receiver thread.
+                shared.sendto(wire, (self.target_ip, DNS_PORT))
+                recv_ns = self._wait_for_reply(request, pending, time.monotonic() + timeout)
+            finally:
+                shared.unregister(key)
+
+            rtt_ms = (recv_ns - start_ns) / 1_000_000
+            logger.debug("DNS probe to %s for %s [%s] success: %.2f ms.", self.target_ip, domain, qtype_str, rtt_ms)
+            return rtt_ms, "success", metadata
 
         except dns.exception.Timeout:
-            logger.warning(f"DNS probe to {self.target_ip} timed out after {timeout}s.")
+            logger.warning("DNS probe to %s timed out after %ss.", self.target_ip, timeout)
             return None, "timeout", metadata
         except Exception as e:
             logger.error(f"An unexpected error occurred during DNS probe to {self.target_ip}: {e}")
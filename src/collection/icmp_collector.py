@@ -8,6 +8,19 @@ class IcmpCollector(BaseCollector):
     """
     Collector for ICMP RTT measurements using ping.
     """
+    def __init__(self, target_ip, config, output_queue):
+        """
+        Initializes the ICMP collector, reading its probe settings once.
+
+        Args:
+            target_ip (str): The target IP address to probe.
+            config (configparser.ConfigParser): The application configuration.
+            output_queue (multiprocessing.Queue): The queue to put results into.
+        """
+        super().__init__(target_ip, config, output_queue)
+        self._timeout = config.getint('ICMP', 'timeout', fallback=2)
+        self._packet_size = config.getint('ICMP', 'packet_size', fallback=56)
+
     def probe(self):
         """
         Executes a single ICMP ping to the target IP.
@@ -15,23 +28,22 @@ class IcmpCollector(BaseCollector):
         Returns:
             tuple: (rtt_ms, status, metadata)
         """
-        timeout = self.config.getint('ICMP', 'timeout', fallback=2)
-        packet_size = self.config.getint('ICMP', 'packet_size', fallback=56)
-        
+        timeout = self._timeout
+
         try:
-            rtt = ping3.ping(self.target_ip, unit='ms', timeout=timeout, size=packet_size)
+            rtt = ping3.ping(self.target_ip, unit='ms', timeout=timeout, size=self._packet_size)
             
             if rtt is False:
                 # Destination Unreachable or other ICMP error
-                logger.warning(f"ICMP probe to {self.target_ip} failed (Destination Unreachable).")
+                logger.warning("ICMP probe to %s failed (Destination Unreachable).", self.target_ip)
                 return None, "error", {"error_message": "Destination Unreachable"}
             elif rtt is None:
                 # Timeout
-                logger.warning(f"ICMP probe to {self.target_ip} timed out after {timeout}s.")
+                logger.warning("ICMP probe to %s timed out after %ss.", self.target_ip, timeout)
                 return None, "timeout", {}
             else:
                 # Success
-                logger.debug(f"ICMP probe to {self.target_ip} success: {rtt:.2f} ms.")
+                logger.debug("ICMP probe to %s success: %.2f ms.", self.target_ip, rtt)
                 return rtt, "success", {}
 
         except PermissionError:
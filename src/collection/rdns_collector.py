@@ -1,5 +1,6 @@
 import time
 import logging
+import threading
 import dns.resolver
 import dns.reversename
 from .base_collector import BaseCollector
@@ -11,6 +12,33 @@ class RdnsCollector(BaseCollector):
     Collector to perform reverse DNS (PTR) lookup for the target IP.
     This is metadata-oriented; no RTT value is returned to avoid polluting RTT stats.
     """
+    # System resolver shared by all RDNS collectors; built on first use so that
+    # /etc/resolv.conf is parsed once rather than on every probe
+    _resolver = None
+    _resolver_lock = threading.Lock()
+
+    def __init__(self, target_ip, config, output_queue):
+        """
+        Initializes the RDNS collector, reading its timeout once.
+
+        Args:
+            target_ip (str): The target IP address to probe.
+            config (configparser.ConfigParser): The application configuration.
+            output_queue (multiprocessing.Queue): The queue to put results into.
+        """
+        super().__init__(target_ip, config, output_queue)
+        self._timeout = config.getfloat('RDNS', 'timeout', fallback=3.0)
+        # PTR name for target_ip; built on the first probe so an invalid address
+        # still fails that probe rather than collector setup
+        self._rev_name = None
+
+    @classmethod
+    def _get_resolver(cls):
+        with cls._resolver_lock:
+            if cls._resolver is None:
+                cls._resolver = dns.resolver.Resolver(configure=True)
+            return cls._resolver
+
     def probe(self):
         """
         Executes a reverse DNS (PTR) query for the target IP using system resolver.
@@ -18,21 +46,22 @@ class RdnsCollector(BaseCollector):
         Returns:
             tuple: (rtt_ms, status, metadata)
         """
-        timeout = self.config.getfloat('RDNS', 'timeout', fallback=3.0)
-        resolver = dns.resolver.Resolver(configure=True)
-        # total lifetime for a query
-        resolver.lifetime = timeout
+        timeout = self._timeout
 
-        name = dns.reversename.from_address(self.target_ip)
+        if self._rev_name is None:
+            self._rev_name = dns.reversename.from_address(self.target_ip)
+        name = self._rev_name
         metadata = {"ptr_name": None, "query_time_ms": None}
 
         try:
-            start = time.perf_counter()
+            # The shared resolver is never modified; the total lifetime is passed per query
+            resolver = self._get_resolver()
+            start_ns = time.perf_counter_ns()
             answer = resolver.resolve(name, 'PTR', lifetime=timeout)
-            end = time.perf_counter()
+            end_ns = time.perf_counter_ns()
             ptrs = [str(r.target).rstrip('.') for r in answer]
             metadata["ptr_name"] = ptrs
-            metadata["query_time_ms"] = (end - start) * 1000
+            metadata["query_time_ms"] = (end_ns - start_ns) / 1_000_000
             logger.debug(f"RDNS PTR for {self.target_ip}: {ptrs}")
             # Return None RTT (metadata only)
             return None, "success", metadata
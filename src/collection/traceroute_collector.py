@@ -1,75 +1,193 @@
 import os
-import re
+import time
+import shutil
 import platform
 import subprocess
+import threading
 import logging
 from .base_collector import BaseCollector
 
 logger = logging.getLogger("SatelliteDetector.TracerouteCollector")
 
+# The OS cannot change while running; platform.system() does a uname() per call
+_IS_WINDOWS = platform.system() == 'Windows'
+
+# Characters of an IPv6 literal, '.' included for IPv4-mapped forms (::ffff:1.2.3.4)
+_IPV6_CHARS = frozenset('0123456789abcdefABCDEF:.')
+
+# Successful traceroute metadata per command line: cmd tuple -> (monotonic time, metadata).
+# Only used when [Traceroute] cache_ttl > 0.
+_TRACE_CACHE = {}
+_TRACE_CACHE_LOCK = threading.Lock()
+
+
+def _parse_hop_tokens(tokens):
+    """
+    Classifies the whitespace-separated tokens of one hop line.
+
+    A token followed by 'ms' is an RTT (Windows prints '<1' for sub-millisecond
+    replies); a dotted quad of digits or a hex-and-colon token is an IP address,
+    the last one winning. Anything else ('*', 'Request timed out.', '!H', ...)
+    is ignored.
+
+    Args:
+        tokens (list[str]): The split hop line; tokens[0] must be the hop number.
+
+    Returns:
+        tuple: (hop_no, ip, rtts) where ip is None if no address was found.
+    """
+    ip = None
+    rtts = []
+    last = len(tokens) - 1
+    for i in range(1, len(tokens)):
+        tok = tokens[i]
+        if i < last and tokens[i + 1] == 'ms':
+            value = tok.lstrip('<')
+            # Digits with at most one '.', so float() cannot raise
+            if value.replace('.', '', 1).isdigit():
+                rtts.append(float(value))
+        elif tok.count('.') == 3 and tok.replace('.', '').isdigit():
+            ip = tok
+        elif ':' in tok and _IPV6_CHARS.issuperset(tok):
+            ip = tok
+    return int(tokens[0]), ip, rtts
+
+
 class TracerouteCollector(BaseCollector):
     """
     Collector that performs a traceroute to the target IP and records hop RTTs as metadata.
     This collector is heavier and typically scheduled to run once per task.
     """
-    def probe(self):
+    def __init__(self, target_ip, config, output_queue):
         """
-        Executes a traceroute (Windows: tracert, Unix: traceroute) and parses output.
+        Initializes the traceroute collector, building its command line once.
 
-        Returns:
-            tuple: (rtt_ms, status, metadata) where rtt_ms is None and metadata contains hops.
+        Args:
+            target_ip (str): The target IP address to probe.
+            config (configparser.ConfigParser): The application configuration.
+            output_queue (multiprocessing.Queue): The queue to put results into.
         """
-        timeout = self.config.getfloat('Traceroute', 'timeout', fallback=3.0)
-        max_hops = self.config.getint('Traceroute', 'max_hops', fallback=20)
-        queries = self.config.getint('Traceroute', 'queries_per_hop', fallback=3)
-
-        system = platform.system()
+        super().__init__(target_ip, config, output_queue)
+        timeout = config.getfloat('Traceroute', 'timeout', fallback=3.0)
+        max_hops = config.getint('Traceroute', 'max_hops', fallback=20)
+        queries = config.getint('Traceroute', 'queries_per_hop', fallback=3)
 
         # Build command per platform
-        if system == 'Windows':
+        if _IS_WINDOWS:
             # -d: don't resolve names, -h max hops, -w timeout(ms)
-            cmd = [
+            self._cmd = [
                 'tracert', '-d',
                 '-h', str(max_hops),
                 '-w', str(int(timeout * 1000)),
-                self.target_ip
+                target_ip
             ]
         else:
             # -n no DNS, -m max hops, -w wait (per probe), -q queries per hop
-            cmd = [
+            self._cmd = [
                 'traceroute', '-n',
                 '-m', str(max_hops),
                 '-w', str(timeout),
                 '-q', str(queries),
-                self.target_ip
+                target_ip
             ]
+            # An absolute path (resolved once) lets subprocess start it with
+            # posix_spawn instead of fork+exec; a missing binary keeps the bare name
+            # so probe() still reports it as not found
+            self._cmd[0] = shutil.which('traceroute') or 'traceroute'
+        # Give a generous timeout: per-hop * max_hops * (queries+1)
+        self._overall_timeout = max(10, int((timeout * max_hops * (queries + 1)) + 5))
+        # Stop once this many hops in a row got no reply at all (0 = run to max_hops)
+        self._max_silent_hops = config.getint('Traceroute', 'max_consecutive_silent_hops', fallback=0)
+        # Seconds a successful result is reused for the same target (0 = never)
+        self._cache_ttl = config.getfloat('Traceroute', 'cache_ttl', fallback=0.0)
+        self._cache_key = tuple(self._cmd)
+
+    def probe(self):
+        """
+        Executes a traceroute (Windows: tracert, Unix: traceroute) and parses output.
+
+        Returns:
+            tuple: (rtt_ms, status, metadata) where rtt_ms is None and metadata contains hops.
+        """
+        if self._cache_ttl > 0:
+            with _TRACE_CACHE_LOCK:
+                cached = _TRACE_CACHE.get(self._cache_key)
+            if cached is not None and time.monotonic() - cached[0] < self._cache_ttl:
+                logger.debug("Reusing cached traceroute for %s", self.target_ip)
+                return None, 'success', cached[1]
+
+        cmd = self._cmd
+        overall_timeout = self._overall_timeout
 
         try:
-            logger.debug(f"Running traceroute: {' '.join(cmd)}")
-            # Give a generous timeout: per-hop * max_hops * (queries+1)
-            overall_timeout = max(10, int((timeout * max_hops * (queries + 1)) + 5))
-            proc = subprocess.run(
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Running traceroute: %s", ' '.join(cmd))
+            # Stream the output and parse each hop as it arrives instead of buffering
+            # it all until exit. stderr is merged in: its lines are not hop lines.
+            timed_out = threading.Event()
+            hops = []
+            destination_reached = False
+            stopped_after_silent_hops = False
+            with subprocess.Popen(
                 cmd,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=overall_timeout,
-                check=False
-            )
-
-            output = proc.stdout or ''
-            if not output and proc.stderr:
-                output = proc.stderr
-
-            hops = self._parse_output(output, system)
-            destination_reached = any(h.get('ip') == self.target_ip for h in hops)
+                bufsize=1,
+                # Python's own fds are non-inheritable anyway; close_fds=True would
+                # rule out posix_spawn on POSIX (Windows keeps its default)
+                close_fds=_IS_WINDOWS
+            ) as proc:
+                def kill():
+                    timed_out.set()
+                    proc.kill()
+
+                timer = threading.Timer(overall_timeout, kill)
+                timer.start()
+                try:
+                    # Loop invariants bound once as locals
+                    parse_line = self._parse_line
+                    target_ip = self.target_ip
+                    max_silent_hops = self._max_silent_hops
+                    silent_hops = 0
+                    for line in proc.stdout:
+                        hop = parse_line(line)
+                        if hop is None:
+                            continue
+                        hops.append(hop)
+                        if hop['ip'] == target_ip:
+                            destination_reached = True
+                        # A silent tail (firewalled target) would otherwise wait out
+                        # every remaining hop's timeouts up to max_hops
+                        if hop['ip'] is None and not hop['rtts_ms']:
+                            silent_hops += 1
+                            if silent_hops == max_silent_hops:
+                                stopped_after_silent_hops = True
+                                proc.terminate()
+                                break
+                        else:
+                            silent_hops = 0
+                    proc.wait()
+                finally:
+                    timer.cancel()
+                    if proc.poll() is None:
+                        proc.kill()
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(cmd, overall_timeout)
 
             metadata = {
                 'hops': hops,
                 'destination_reached': destination_reached,
+                # True when the trace was cut short by max_consecutive_silent_hops, so
+                # a truncated trace is not mistaken for a real path failure
+                'stopped_after_silent_hops': stopped_after_silent_hops,
                 'exit_code': proc.returncode
             }
 
             status = 'success' if hops else 'error'
+            if status == 'success' and self._cache_ttl > 0:
+                with _TRACE_CACHE_LOCK:
+                    _TRACE_CACHE[self._cache_key] = (time.monotonic(), metadata)
             return None, status, metadata
         except subprocess.TimeoutExpired:
             logger.warning("Traceroute timed out before completion.")
@@ -81,51 +199,28 @@ class TracerouteCollector(BaseCollector):
             logger.error(f"Traceroute unexpected error: {e}")
             return None, 'error', {'error_message': str(e)}
 
-    def _parse_output(self, text, system):
-        """Parses traceroute/tracert plain text into a list of hop dicts."""
-        hops = []
-        lines = text.splitlines()
-        for line in lines:
-            line = line.strip()
-            # Skip headers/blank
-            if not line:
-                continue
-            # Windows example: "  1     1 ms     1 ms     1 ms  192.168.0.1"
-            # Linux example:   " 1  192.168.0.1  0.345 ms  0.220 ms  0.190 ms"
-            m = re.match(r"^(\d+)\s+(.*)$", line)
-            if not m:
-                continue
-            hop_no = int(m.group(1))
-            rest = m.group(2)
-
-            # Extract IP (last IPv4/IPv6 token) and RTT values
-            ip = None
-            rtts = []
-
-            # Pick all occurrences of "<num> ms" (Windows may show '<1 ms')
-            for ms in re.findall(r"(\d+)\s*ms", rest.replace('<', '')):
-                try:
-                    rtts.append(float(ms))
-                except ValueError:
-                    pass
-
-            # Find IP address (prefer last IPv4/IPv6 token)
-            # IPv4
-            ipv4s = re.findall(r"(\d+\.\d+\.\d+\.\d+)", rest)
-            # IPv6 (simple heuristic)
-            ipv6s = re.findall(r"([0-9a-fA-F:]{2,})", rest)
-
-            if ipv4s:
-                ip = ipv4s[-1]
-            elif ipv6s:
-                # Filter out pure RTT units accidentally matched
-                ip = [x for x in ipv6s if ':' in x][-1] if any(':' in x for x in ipv6s) else None
-
-            avg_ms = sum(rtts) / len(rtts) if rtts else None
-            hops.append({
-                'hop': hop_no,
-                'ip': ip,
-                'rtts_ms': rtts,
-                'avg_ms': avg_ms
-            })
-        return hops
+    def _parse_line(self, line):
+        """
+        Parses one line of traceroute/tracert output.
+
+        Args:
+            line (str): A line of output, with or without its trailing newline.
+
+        Returns:
+            dict or None: The hop dict, or None for headers and blank lines.
+        """
+        # Windows example: "  1     1 ms     1 ms     1 ms  192.168.0.1"
+        # Linux example:   " 1  192.168.0.1  0.345 ms  0.220 ms  0.190 ms"
+        tokens = line.split()
+        # Skip headers/blank: hop lines start with the hop number
+        if not tokens or not tokens[0].isdigit():
+            return None
+        hop_no, ip, rtts = _parse_hop_tokens(tokens)
+
+        avg_ms = sum(rtts) / len(rtts) if rtts else None
+        return {
+            'hop': hop_no,
+            'ip': ip,
+            'rtts_ms': rtts,
+            'avg_ms': avg_ms
+        }
@@ -1,10 +1,15 @@
 import configparser
+import functools
 import os
 
 def load_config(config_path='configs/default_config.ini'):
     """
     Loads the configuration from a .ini file.
 
+    Parsed configs are cached by absolute path and modification time, so
+    repeated loads of an unchanged file return the same object. Callers must
+    treat the returned config as read-only.
+
     Args:
         config_path (str): The path to the configuration file.
 
@@ -14,9 +19,15 @@ def load_config(config_path='configs/default_config.ini'):
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Configuration file not found at: {config_path}")
 
+    path = os.path.abspath(config_path)
+    return _load_cached(path, os.path.getmtime(path))
+
+@functools.lru_cache(maxsize=8)
+def _load_cached(path, mtime):
+    # mtime is only part of the cache key: an edited file gets a fresh parse
     config = configparser.ConfigParser()
     # Specify UTF-8 encoding to handle non-ASCII characters in comments
-    config.read(config_path, encoding='utf-8')
+    config.read(path, encoding='utf-8')
     return config
 
 if __name__ == '__main__':
@@ -0,0 +1,36 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+
+if orjson is not None:
+    def dumps_line(obj):
+        """
+        Serializes an object to one newline-terminated JSON line.
+
+        Args:
+            obj: A JSON-serializable object (typically a probe result dict).
+
+        Returns:
+            bytes: The UTF-8 encoded JSON line, ready for a binary-mode file.
+        """
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+else:
+    def dumps_line(obj):
+        """
+        Serializes an object to one newline-terminated JSON line.
+
+        Args:
+            obj: A JSON-serializable object (typically a probe result dict).
+
+        Returns:
+            bytes: The UTF-8 encoded JSON line, ready for a binary-mode file.
+        """
+        return (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+# Parses one JSON document from str or UTF-8 bytes (e.g. a JSONL line)
+loads = orjson.loads if orjson is not None else json.loads
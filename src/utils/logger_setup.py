@@ -1,15 +1,28 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-def setup_logger(log_dir, log_level='INFO', log_format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'):
+# Listener thread writing the queued records of the current process, and that process's pid
+_listener = None
+_listener_pid = None
+
+def setup_logger(log_dir, log_level='INFO', log_format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                 log_filename='task.log'):
     """
     Sets up the logger for the application.
 
+    Records are put on an in-memory queue and written to the console and the
+    log file by a background listener thread, so probe threads never wait on
+    disk I/O. Call shutdown_logger() before a process exits without running
+    atexit handlers (e.g. multiprocessing children) so no records are lost.
+
     Args:
         log_dir (str): The directory where the log file will be stored.
         log_level (str): The logging level (e.g., 'INFO', 'DEBUG').
         log_format (str): The format for the log messages.
+        log_filename (str): The name of the log file inside log_dir.
 
     Returns:
         logging.Logger: The configured logger object.
@@ -17,27 +30,53 @@ def setup_logger(log_dir, log_level='INFO', log_format='%(asctime)s - %(name)s -
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
 
-    log_file = os.path.join(log_dir, 'task.log')
+    log_file = os.path.join(log_dir, log_filename)
 
     logger = logging.getLogger("SatelliteDetector")
     logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
 
     # Prevent adding multiple handlers if the function is called more than once
+    shutdown_logger()
     if logger.hasHandlers():
         logger.handlers.clear()
 
     # Create a console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(logging.Formatter(log_format))
-    logger.addHandler(console_handler)
 
     # Create a rotating file handler
     file_handler = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=5)
     file_handler.setFormatter(logging.Formatter(log_format))
-    logger.addHandler(file_handler)
+
+    # Both handlers run on the listener thread; the logger only enqueues
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    global _listener, _listener_pid
+    _listener = QueueListener(log_queue, console_handler, file_handler)
+    _listener.start()
+    _listener_pid = os.getpid()
 
     return logger
 
+def shutdown_logger():
+    """
+    Writes out all queued log records and stops the listener thread.
+
+    Safe to call more than once. A listener inherited from a forked parent is
+    dropped without being stopped, since its thread does not exist in the child.
+    """
+    global _listener, _listener_pid
+    if _listener is None:
+        return
+    if _listener_pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+    _listener_pid = None
+
+atexit.register(shutdown_logger)
+
 if __name__ == '__main__':
     # Example usage:
     # This allows you to run this script directly to test the logger setup.
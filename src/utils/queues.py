@@ -0,0 +1,108 @@
+import threading
+import time
+
+
+class BatchedQueue:
+    """
+    Producer-side wrapper that hands results to a multiprocessing.Queue in lists.
+
+    Collectors call put() once per result from the scheduler's worker threads.
+    Results are buffered and put on the underlying queue as a single list once
+    `batch_size` results are waiting or the oldest one has waited `max_delay`
+    seconds, so one pickle and pipe write covers many results. A daemon flusher
+    thread enforces `max_delay` when no further put() arrives, so a lone result
+    never sits in the buffer. Writers must accept both single items and lists.
+    """
+    def __init__(self, queue, batch_size=32, max_delay=0.05):
+        """
+        Initializes the batched queue.
+
+        Args:
+            queue (multiprocessing.Queue): The queue read by the I/O writer.
+            batch_size (int): Number of buffered results that triggers a put.
+            max_delay (float): Seconds a buffered result may wait before a put.
+        """
+        self.queue = queue
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        # Wakes the flusher when the buffer goes from empty to non-empty
+        self._cond = threading.Condition(self._lock)
+        self._buffer = []
+        self._oldest = 0.0
+        # Started on the first put(), so an unused wrapper costs no thread
+        self._flusher = None
+
+    def put(self, item):
+        """
+        Buffers one result, passing the buffer on when it is full or old enough.
+
+        Args:
+            item: The result to send to the writer.
+        """
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, name='batched-queue-flusher', daemon=True)
+                    self._flusher.start()
+                self._cond.notify()
+            self._buffer.append(item)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._oldest >= self.max_delay:
+                self._put_buffer()
+
+    def flush(self):
+        """
+        Passes any buffered results on. Must be called before the writer's stop sentinel.
+        """
+        with self._lock:
+            if self._buffer:
+                self._put_buffer()
+
+    def _flush_loop(self):
+        # Puts the buffer once its oldest result is `max_delay` old, for results
+        # that no later put() would pass on
+        with self._lock:
+            while True:
+                if not self._buffer:
+                    self._cond.wait()
+                    continue
+                remaining = self._oldest + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                else:
+                    self._put_buffer()
+
+    def _put_buffer(self):
+        # Called with the lock held so batches reach the queue in order
+        self.queue.put(self._buffer)
+        self._buffer = []
+
+
+class LabeledQueue:
+    """
+    Producer-side wrapper that tags each result with a label before queueing it.
+
+    Lets several target groups (e.g. ground / satellite in mass mode) share one
+    writer: the writer routes each result on its 'label' field.
+    """
+    def __init__(self, queue, label):
+        """
+        Initializes the labeled queue.
+
+        Args:
+            queue: The queue (or BatchedQueue) shared by all labels.
+            label (str): The label added to every result put through this wrapper.
+        """
+        self.queue = queue
+        self.label = label
+
+    def put(self, item):
+        """
+        Tags one result with the label and passes it on.
+
+        Args:
+            item (dict): The result to send to the writer.
+        """
+        item['label'] = self.label
+        self.queue.put(item)
@@ -0,0 +1,24 @@
+import time
+
+# (epoch second, formatted 'YYYY-MM-DDTHH:MM:SS' for that second); swapped as one
+# tuple so concurrent probe threads never pair a second with another second's prefix
+_second_prefix = (None, '')
+
+
+def utc_isoformat_now():
+    """
+    Returns the current UTC time as an ISO 8601 string with microseconds.
+
+    Equivalent to datetime.utcnow().isoformat(timespec='microseconds'), but the
+    date/time part is formatted only once per second and reused.
+
+    Returns:
+        str: A timestamp such as '2025-01-01T12:00:00.123456'.
+    """
+    global _second_prefix
+    seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _second_prefix
+    if seconds != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))
+        _second_prefix = (seconds, prefix)
+    return f"{prefix}.{nanos // 1000:06d}"